@@ -2,35 +2,49 @@
 """Generate shared context for MESH conversation follow-ups."""
 import json, sys, os
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 conv_file = sys.argv[1] if len(sys.argv) > 1 else ""
 if not conv_file or not os.path.exists(conv_file):
     sys.exit(0)  # No context = empty output
 
 try:
-    with open(conv_file) as f:
-        conv = json.load(f)
+    with open(conv_file, "rb") as f:
+        conv = _loads(f.read())
     
     rounds = conv.get("rounds", [])
     if not rounds:
         sys.exit(0)
     
-    lines = ["📋 CONVERSATION CONTEXT (prior rounds):"]
-    lines.append(f"Conversation: {conv.get('conversationId', '?')}")
-    lines.append(f"Participants: {', '.join(conv.get('participants', []))}")
-    lines.append("")
+    out = bytearray()
+
+    def emit(line=""):
+        out.extend(line.encode())
+        out.extend(b"\n")
+
+    emit("📋 CONVERSATION CONTEXT (prior rounds):")
+    emit(f"Conversation: {conv.get('conversationId', '?')}")
+    emit(f"Participants: {', '.join(conv.get('participants', []))}")
+    emit()
     
     for i, r in enumerate(rounds, 1):
-        lines.append(f"── Round {i} ({r.get('status', '?')}) ──")
-        lines.append(f"Q: {r.get('question', '?')[:200]}")
-        for resp in r.get("responses", []):
-            agent = resp.get("agent", resp.get("from", "?"))
-            body = resp.get("body", resp.get("summary", ""))[:300]
-            lines.append(f"  {agent}: {body}")
-        if not r.get("responses"):
-            lines.append("  (no responses yet)")
-        lines.append("")
+        emit(f"── Round {i} ({r.get('status', '?')}) ──")
+        emit(f"Q: {r.get('question', '?')[:200]}")
+        responses = r.get("responses")
+        for resp in responses or ():
+            agent = resp["agent"] if "agent" in resp else resp.get("from", "?")
+            body = resp["body"] if "body" in resp else resp.get("summary", "")
+            emit(f"  {agent}: {body[:300]}")
+        if not responses:
+            emit("  (no responses yet)")
+        emit()
     
-    print("\n".join(lines))
+    sys.stdout.buffer.write(out)
+    sys.stdout.flush()
 except Exception as e:
     print(f"[context error: {e}]", file=sys.stderr)
     sys.exit(0)
@@ -11,15 +11,208 @@ Usage:
         state_dir="/path/to/state/",
         registry="/path/to/agent-registry.json"
     )
+
+    # Page through the full audit history without loading it all at once:
+    for next_offset, entries in iter_audit_pages("/path/to/mesh-audit.jsonl"):
+        ...
 """
 
 import json
 import os
-import subprocess
+import threading
+from collections import Counter, defaultdict, deque
 from datetime import datetime, timezone, timedelta
+from operator import itemgetter
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Only the tail of the audit log is scanned; older entries never reach the panel.
+AUDIT_TAIL_BYTES = 256 * 1024
+AUDIT_MAX_MESSAGES = 200
+
+# Audit fields the stats pass reads, with the defaults used when one is missing
+_AUDIT_DEFAULTS = {"status": "unknown", "to": "unknown", "type": "unknown", "ts": None}
+_audit_fields = itemgetter(*_AUDIT_DEFAULTS)
+
+
+# Per-path tail state, so repeated polls only read bytes appended since the last call.
+_audit_cache = {}
+_audit_lock = threading.Lock()
+
+
+def _read_audit_tail(path, tail_bytes=AUDIT_TAIL_BYTES, max_messages=AUDIT_MAX_MESSAGES):
+    """Return up to max_messages of the newest entries in path.
+
+    The first call reads the final tail_bytes; later calls only parse lines
+    appended since and push them onto the cached window, so entries older than
+    the current tail stay until newer ones displace them. Rotation (new inode),
+    truncation, or more than tail_bytes appended since the last call starts
+    over from the tail, so no call reads more than tail_bytes.
+    """
+    with _audit_lock:
+        st = os.stat(path)
+        cache = _audit_cache.get(path)
+        if (cache is None or cache["inode"] != st.st_ino or st.st_size < cache["offset"]
+                or st.st_size - tail_bytes > cache["offset"]
+                or cache["tail_bytes"] != tail_bytes or cache["recent"].maxlen != max_messages):
+            offset = max(0, st.st_size - tail_bytes)
+            cache = _audit_cache[path] = {
+                "inode": st.st_ino,
+                "tail_bytes": tail_bytes,
+                "offset": offset,
+                "synced": offset == 0,
+                "recent": deque(maxlen=max_messages),
+            }
+
+        if st.st_size > cache["offset"]:
+            lines = []
+            with open(path, "rb") as f:
+                if not cache["synced"]:
+                    f.seek(cache["offset"] - 1)
+                    if f.read(1) != b"\n":
+                        partial = f.readline()  # drop the partial line we landed in
+                        if not partial.endswith(b"\n"):
+                            return list(cache["recent"])
+                        cache["offset"] += len(partial)
+                    cache["synced"] = True
+                else:
+                    f.seek(cache["offset"])
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # still being written; picked up on the next call
+                    cache["offset"] += len(line)
+                    line = line.strip()
+                    if line:
+                        lines.append(line)
+
+            # Decode newest first and stop once the window is full, so corrupt
+            # lines never take a slot and older lines are never decoded. The
+            # panel renders whole entries, so stats cannot skip the decode.
+            fresh = []
+            for line in reversed(lines):
+                if len(fresh) == max_messages:
+                    break
+                try:
+                    fresh.append(_loads(line))
+                except ValueError:
+                    pass
+            cache["recent"].extend(reversed(fresh))
+
+        return list(cache["recent"])
+
+
+# path -> ((st_mtime_ns, st_size), parsed) for registry and state files
+_json_cache = {}
+
+
+def _load_json_cached(path):
+    """Parse a JSON file, reusing the last result while its mtime and size are unchanged.
+
+    The returned object is shared with the cache; copy before handing it out.
+    """
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _json_cache.get(path)
+    if cached is None or cached[0] != stamp:
+        with open(path, "rb") as f:
+            cached = _json_cache[path] = (stamp, _loads(f.read()))
+    return cached[1]
+
+
+def iter_audit_pages(path, page_bytes=AUDIT_TAIL_BYTES, offset=0):
+    """Yield (next_offset, entries) batches from path, reading ~page_bytes at a time.
+
+    Peak memory is bounded by page_bytes regardless of file size. Pass a yielded
+    next_offset back as offset to resume; an offset inside a line skips ahead to
+    the next full line. A final line with no newline yet is left for the next
+    resume, so next_offset never points past an entry that was not yielded.
+    """
+    with open(path, "rb") as f:
+        if offset:
+            f.seek(offset - 1)
+            if f.read(1) != b"\n":
+                f.readline()
+        pos = f.tell()
+        at_end = False
+        while not at_end:
+            chunk = f.read(page_bytes)
+            if not chunk.endswith(b"\n"):
+                chunk += f.readline()  # finish the line the page boundary split
+            if not chunk.endswith(b"\n"):
+                # Reached EOF, possibly inside a line that is still being written
+                at_end = True
+                chunk = chunk[:chunk.rfind(b"\n") + 1]
+                if not chunk:
+                    return
+            pos += len(chunk)
+
+            entries = []
+            for line in chunk.splitlines():
+                line = line.strip()
+                if line:
+                    try:
+                        entries.append(_loads(line))
+                    except ValueError:
+                        pass
+            yield pos, entries
+
+
+_TS_LEN = len("2026-01-01T00:00:00.000Z")
+
+
+def _ts_after(ts, cutoff):
+    """Slow path for timestamps not in MESH's own fixed format."""
+    try:
+        return datetime.fromisoformat(ts.replace("Z", "+00:00")) > cutoff
+    except (ValueError, TypeError):
+        return False
+
+
+def _summarize(messages):
+    """Aggregate dashboard stats over parsed audit entries."""
+    day_ago = datetime.now(timezone.utc) - timedelta(hours=24)
+    # MESH writes UTC timestamps as YYYY-MM-DDTHH:MM:SS.mmmZ, which sort as strings
+    day_ago_str = day_ago.strftime("%Y-%m-%dT%H:%M:%S")
+
+    total_sent = total_failed = last24h = 0
+    by_agent = defaultdict(lambda: {"sent": 0, "received": 0, "failed": 0})
+    by_type = Counter()
+    for msg in messages:
+        try:
+            status, to_agent, msg_type, ts = _audit_fields(msg)
+        except KeyError:
+            status, to_agent, msg_type, ts = _audit_fields({**_AUDIT_DEFAULTS, **msg})
+
+        if status == "sent":
+            total_sent += 1
+        elif "error" in status or "fail" in status:
+            total_failed += 1
+
+        by_agent[to_agent]["sent"] += 1
+        by_type[msg_type] += 1
 
+        if isinstance(ts, str):
+            if len(ts) == _TS_LEN and ts[-1] == "Z":
+                if ts > day_ago_str:
+                    last24h += 1
+            elif _ts_after(ts, day_ago):
+                last24h += 1
 
-def collect_mesh_data(audit_log=None, state_dir=None, registry=None, ssh_agents=False):
+    return {
+        "totalSent": total_sent, "totalReceived": 0, "totalFailed": total_failed,
+        "byAgent": dict(by_agent),
+        "byType": dict(by_type),
+        "last24h": last24h,
+    }
+
+
+def collect_mesh_data(audit_log=None, state_dir=None, registry=None, ssh_agents=False,
+                      audit_tail_bytes=AUDIT_TAIL_BYTES, audit_max_messages=AUDIT_MAX_MESSAGES):
     """Collect MESH protocol stats for dashboard display.
     
     Args:
@@ -27,6 +220,8 @@ def collect_mesh_data(audit_log=None, state_dir=None, registry=None, ssh_agents=
         state_dir: Path to state/ directory
         registry: Path to agent-registry.json
         ssh_agents: If True, SSH to remote agents for their audit logs (slow)
+        audit_tail_bytes: How far back from the end of the audit log to scan
+        audit_max_messages: How many of the most recent entries to return and count
     
     Returns:
         dict with messages, stats, circuitBreakers, deadLetters, incidents, registry
@@ -50,50 +245,16 @@ def collect_mesh_data(audit_log=None, state_dir=None, registry=None, ssh_agents=
 
     # Load registry
     try:
-        with open(registry) as f:
-            data["registry"] = json.load(f).get("agents", {})
+        data["registry"] = dict(_load_json_cached(registry).get("agents", {}))
     except Exception:
         pass
 
     # Load audit log
     try:
-        messages = []
-        with open(audit_log) as f:
-            for line in f:
-                line = line.strip()
-                if line:
-                    try:
-                        messages.append(json.loads(line))
-                    except json.JSONDecodeError:
-                        pass
-        messages = messages[-200:]
+        messages = _read_audit_tail(audit_log, audit_tail_bytes, audit_max_messages)
         data["messages"] = messages
 
-        now = datetime.now(timezone.utc)
-        day_ago = now - timedelta(hours=24)
-
-        for msg in messages:
-            status = msg.get("status", "unknown")
-            msg_type = msg.get("type", "unknown")
-            to_agent = msg.get("to", "unknown")
-
-            if status == "sent":
-                data["stats"]["totalSent"] += 1
-            elif "error" in status or "fail" in status:
-                data["stats"]["totalFailed"] += 1
-
-            data["stats"]["byType"][msg_type] = data["stats"]["byType"].get(msg_type, 0) + 1
-
-            if to_agent not in data["stats"]["byAgent"]:
-                data["stats"]["byAgent"][to_agent] = {"sent": 0, "received": 0, "failed": 0}
-            data["stats"]["byAgent"][to_agent]["sent"] += 1
-
-            try:
-                ts = datetime.fromisoformat(msg.get("ts", "").replace("Z", "+00:00"))
-                if ts > day_ago:
-                    data["stats"]["last24h"] += 1
-            except (ValueError, TypeError):
-                pass
+        data["stats"] = _summarize(messages)
     except FileNotFoundError:
         pass
 
@@ -102,14 +263,13 @@ def collect_mesh_data(audit_log=None, state_dir=None, registry=None, ssh_agents=
                        ("dead-letters.json", "deadLetters"),
                        ("active-incidents.json", "incidents")]:
         try:
-            with open(os.path.join(state_dir, name)) as f:
-                content = json.load(f)
-                if key == "deadLetters":
-                    data[key] = content.get("messages", [])
-                elif key == "incidents":
-                    data[key] = content.get("incidents", [])
-                else:
-                    data[key] = content
+            content = _load_json_cached(os.path.join(state_dir, name))
+            if key == "deadLetters":
+                data[key] = list(content.get("messages", []))
+            elif key == "incidents":
+                data[key] = list(content.get("incidents", []))
+            else:
+                data[key] = dict(content)
         except Exception:
             pass
 
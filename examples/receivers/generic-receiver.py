@@ -7,111 +7,388 @@ Usage:
     python3 generic-receiver.py                    # Start on port 8900
     python3 generic-receiver.py --port 9000        # Custom port
     MESH_HANDLER=./my-handler.sh python3 generic-receiver.py  # Custom handler script
+    MESH_HANDLER=./worker.py MESH_HANDLER_PERSISTENT=1 python3 generic-receiver.py
 
 Works with: CrewAI, AutoGen, LangGraph, LangChain, custom agents, or any system
 that can process JSON messages.
 
 The handler receives the MESH envelope as a JSON string via stdin.
 Return JSON to stdout to send a response back to the sender.
+
+With MESH_HANDLER_PERSISTENT=1 the handler is started once and kept running:
+each envelope arrives as one JSON line on stdin, and the handler must answer
+each with exactly one line on stdout (an empty line means no response).
 """
 
 import json
 import os
+import selectors
+import signal
 import subprocess
 import sys
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from datetime import datetime, timezone
+import threading
+import time
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from operator import itemgetter
+
+# orjson is optional; the stdlib fallback emits compact ASCII-escaped JSON. It
+# keeps ensure_ascii on so lone surrogates (which json.loads accepts and orjson
+# rejects) serialize as \uXXXX escapes instead of failing to encode.
+try:
+    import orjson
+
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    def _loads(data):
+        return json.loads(data)
+
+    def _dumps(obj):
+        return json.dumps(obj, separators=(",", ":")).encode("ascii")
+
+# urllib3 is optional; when present, replies reuse pooled keep-alive connections.
+try:
+    import urllib3
+
+    _reply_pool = urllib3.PoolManager(timeout=10.0, retries=False)
+except ImportError:
+    _reply_pool = None
 
 MESH_HOME = os.environ.get("MESH_HOME", os.path.expanduser("~/.mesh"))
 MESH_AGENT = os.environ.get("MESH_AGENT", "unknown")
 HANDLER = os.environ.get("MESH_HANDLER", None)
+HANDLER_PERSISTENT = os.environ.get("MESH_HANDLER_PERSISTENT", "") == "1"
+HANDLER_TIMEOUT = 30
+# Persistent handlers are restarted after this many envelopes to bound leaks
+HANDLER_MAX_REQUESTS = 1000
 LOG_FILE = os.path.join(MESH_HOME, "logs", "mesh-audit.jsonl")
+# POST bodies with this Content-Type are the envelope itself, not a {"message": ...} wrapper
+MESH_CONTENT_TYPE = "application/mesh+json"
+_REPLY_WRAPPER_HEAD = b'{"message":'
+
+# Envelope fields read on every POST, with the defaults used when one is missing
+_ENVELOPE_DEFAULTS = {"id": "?", "from": "?", "type": "?", "payload": None}
+_envelope_fields = itemgetter(*_ENVELOPE_DEFAULTS)
+
+# Audit entries are buffered on a persistent handle and flushed every
+# LOG_FLUSH_EVERY messages or LOG_FLUSH_INTERVAL seconds, whichever is first.
+LOG_FLUSH_EVERY = 50
+LOG_FLUSH_INTERVAL = 1.0
+_log_lock = threading.Lock()
+_log_fh = None
+_log_pending = 0
+_log_timer = None
 
 # In-memory message store (for polling-based frameworks)
-message_inbox = []
 MAX_INBOX = 100
+message_inbox = deque(maxlen=MAX_INBOX)
+_inbox_lock = threading.Lock()
+
+
+# (epoch second, formatted second) - strftime only runs once the second changes
+_ts_cache = (None, "")
+
+
+def utc_timestamp():
+    """Current UTC time in MESH's ISO-8601 format, e.g. 2026-01-01T00:00:00.123Z."""
+    global _ts_cache
+    sec, ms = divmod(time.time_ns() // 1_000_000, 1000)
+    cached_sec, prefix = _ts_cache
+    if sec != cached_sec:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec))
+        _ts_cache = (sec, prefix)
+    return f"{prefix}.{ms:03d}Z"
+
+
+# Message ids are cut from a pooled os.urandom() buffer, one syscall per 256 ids
+_RAND_POOL_SIZE = 4096
+_rand_lock = threading.Lock()
+_rand_pool = b""
+_rand_off = 0
+
+
+def new_message_id():
+    """Return a fresh msg_<32 hex> id."""
+    global _rand_pool, _rand_off
+    with _rand_lock:
+        if _rand_off + 16 > len(_rand_pool):
+            _rand_pool = os.urandom(_RAND_POOL_SIZE)
+            _rand_off = 0
+        raw = _rand_pool[_rand_off:_rand_off + 16]
+        _rand_off += 16
+    return f"msg_{raw.hex()}"
 
 
-def log_message(envelope, status="received"):
-    """Append to audit log."""
+def log_message(envelope, status="received", subject=None):
+    """Append to audit log. Pass subject if the caller already extracted it."""
+    global _log_fh, _log_pending, _log_timer
     try:
-        os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
         entry = {
-            "ts": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "ts": utc_timestamp(),
             "from": envelope.get("from", "?"),
             "to": envelope.get("to", MESH_AGENT),
             "type": envelope.get("type", "?"),
             "id": envelope.get("id", "?"),
-            "subject": envelope.get("payload", {}).get("subject", ""),
+            "subject": subject if subject is not None else (envelope.get("payload") or {}).get("subject", ""),
             "status": status,
         }
-        with open(LOG_FILE, "a") as f:
-            f.write(json.dumps(entry) + "\n")
+        line = _dumps(entry) + b"\n"
+        with _log_lock:
+            if _log_fh is None:
+                os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
+                _log_fh = open(LOG_FILE, "ab", buffering=1 << 16)
+            _log_fh.write(line)
+            _log_pending += 1
+            if _log_pending >= LOG_FLUSH_EVERY:
+                _flush_log_locked()
+            elif _log_timer is None:
+                _log_timer = threading.Timer(LOG_FLUSH_INTERVAL, flush_log)
+                _log_timer.daemon = True
+                _log_timer.start()
     except Exception:
         pass
 
 
+def _flush_log_locked():
+    """Flush the audit handle; drop it if LOG_FILE was rotated or removed underneath us.
+
+    Caller holds _log_lock. The next log_message reopens LOG_FILE.
+    """
+    global _log_fh, _log_pending
+    _log_pending = 0
+    if _log_fh is None:
+        return
+    try:
+        _log_fh.flush()
+        try:
+            rotated = os.stat(LOG_FILE).st_ino != os.fstat(_log_fh.fileno()).st_ino
+        except FileNotFoundError:
+            rotated = True
+        if rotated:
+            _log_fh.close()
+            _log_fh = None
+    except Exception:
+        pass
+
+
+def flush_log():
+    """Write any buffered audit entries to disk."""
+    global _log_timer
+    with _log_lock:
+        _log_timer = None
+        if _log_pending:
+            _flush_log_locked()
+
+
+def close_log():
+    """Flush and close the audit log handle."""
+    global _log_fh
+    flush_log()
+    with _log_lock:
+        if _log_fh is not None:
+            try:
+                _log_fh.close()
+            except Exception:
+                pass
+            _log_fh = None
+
+
+def _parse_handler_output(output):
+    """Decode handler output as JSON, falling back to a plain-text body."""
+    if not output:
+        return None
+    try:
+        return _loads(output)
+    except ValueError:
+        return {"body": output.decode("utf-8", "replace")}
+
+
+class _HandlerWorker:
+    """Long-lived handler process speaking newline-delimited JSON over stdin/stdout."""
+
+    def __init__(self, cmd):
+        self.cmd = cmd
+        self.proc = None
+        self.requests = 0
+        self.buf = b""
+        self.lock = threading.Lock()
+
+    def _start(self):
+        self.proc = subprocess.Popen(self.cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+        # Non-blocking so a handler that stops reading cannot stall us past the deadline
+        os.set_blocking(self.proc.stdin.fileno(), False)
+        self.requests = 0
+        self.buf = b""
+
+    def _write(self, data, deadline, timeout):
+        fd = self.proc.stdin.fileno()
+        view = memoryview(data)
+        with selectors.DefaultSelector() as sel:
+            sel.register(fd, selectors.EVENT_WRITE)
+            while view:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not sel.select(remaining):
+                    raise TimeoutError(f"handler did not accept input within {timeout}s")
+                try:
+                    view = view[os.write(fd, view):]
+                except BlockingIOError:
+                    pass
+
+    def _readline(self, deadline, timeout):
+        fd = self.proc.stdout.fileno()
+        with selectors.DefaultSelector() as sel:
+            sel.register(fd, selectors.EVENT_READ)
+            while b"\n" not in self.buf:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not sel.select(remaining):
+                    raise TimeoutError(f"handler did not answer within {timeout}s")
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    raise EOFError("handler exited")
+                self.buf += chunk
+        line, _, self.buf = self.buf.partition(b"\n")
+        return line
+
+    def _stale(self):
+        """True if output is waiting that no request has asked for yet."""
+        if self.buf:
+            return True
+        with selectors.DefaultSelector() as sel:
+            sel.register(self.proc.stdout.fileno(), selectors.EVENT_READ)
+            return bool(sel.select(0))
+
+    def call(self, envelope, timeout=HANDLER_TIMEOUT):
+        """Send one envelope and return the handler's parsed reply, or None."""
+        with self.lock:
+            if (self.proc is None or self.proc.poll() is not None
+                    or self.requests >= HANDLER_MAX_REQUESTS or self._stale()):
+                self._stop()
+                self._start()
+            self.requests += 1
+            deadline = time.monotonic() + timeout
+            try:
+                self._write(_dumps(envelope) + b"\n", deadline, timeout)
+                line = self._readline(deadline, timeout)
+                if self.buf:
+                    raise RuntimeError("handler wrote more than one line for one envelope")
+                response = _parse_handler_output(line.strip())
+                if (isinstance(response, dict) and "correlationId" in response
+                        and response["correlationId"] != envelope.get("id")):
+                    raise RuntimeError(
+                        f"handler answered {response['correlationId']!r} while handling {envelope.get('id')!r}")
+                return response
+            except Exception:
+                # A hung, dead or out-of-step worker would route replies to the
+                # wrong sender; start fresh next time
+                self._stop()
+                raise
+
+    def _stop(self):
+        if self.proc is None:
+            return
+        try:
+            self.proc.stdin.close()
+            self.proc.wait(timeout=5)
+        except Exception:
+            self.proc.kill()
+            self.proc.wait()
+        self.proc = None
+
+    def close(self):
+        with self.lock:
+            self._stop()
+
+
+_worker = _HandlerWorker([HANDLER]) if HANDLER and HANDLER_PERSISTENT else None
+
+
 def dispatch_to_handler(envelope):
     """Send envelope to external handler script/process."""
     if not HANDLER:
         return None
     try:
+        if _worker is not None:
+            return _worker.call(envelope)
         result = subprocess.run(
             [HANDLER],
-            input=json.dumps(envelope),
+            input=_dumps(envelope),
             capture_output=True,
-            text=True,
-            timeout=30,
+            timeout=HANDLER_TIMEOUT,
         )
-        if result.returncode == 0 and result.stdout.strip():
-            try:
-                return json.loads(result.stdout.strip())
-            except json.JSONDecodeError:
-                return {"body": result.stdout.strip()}
-        return None
+        return _parse_handler_output(result.stdout.strip() if result.returncode == 0 else b"")
     except Exception as e:
         print(f"[MESH] Handler error: {e}", file=sys.stderr)
         return None
 
 
 class MeshHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 keeps sender connections open between messages
+    protocol_version = "HTTP/1.1"
+    timeout = 60
+    # Buffer wfile so status line, headers and body leave in one write; the
+    # base handler flushes it after each request
+    wbufsize = -1
+
     def log_message(self, format, *args):
         # Suppress default access logs
         pass
 
+    def handle_expect_100(self):
+        # The interim 100 Continue must go out before the body is read, not
+        # sit in the buffered wfile until the final response
+        ok = super().handle_expect_100()
+        self.wfile.flush()
+        return ok
+
+    def _send_json(self, code, obj):
+        payload = _dumps(obj)
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
     def do_POST(self):
         content_length = int(self.headers.get("Content-Length", 0))
-        body = self.rfile.read(content_length).decode("utf-8")
+        body = self.rfile.read(content_length)
 
         try:
-            data = json.loads(body)
-        except json.JSONDecodeError:
-            self.send_response(400)
-            self.end_headers()
-            self.wfile.write(b'{"error":"invalid JSON"}')
+            data = _loads(body)
+        except ValueError:
+            self._send_json(400, {"error": "invalid JSON"})
             return
 
         # Extract MESH envelope
-        message_raw = data.get("message", "")
-        try:
-            envelope = json.loads(message_raw) if isinstance(message_raw, str) else message_raw
-        except json.JSONDecodeError:
-            envelope = {"payload": {"body": message_raw}}
+        content_type = self.headers.get("Content-Type", "").split(";", 1)[0].strip().lower()
+        if content_type == MESH_CONTENT_TYPE:
+            envelope = data
+        elif isinstance(data, dict):
+            message_raw = data.get("message", "")
+            try:
+                envelope = _loads(message_raw) if isinstance(message_raw, str) else message_raw
+            except ValueError:
+                envelope = {"payload": {"body": message_raw}}
+        else:
+            envelope = None
+        if not isinstance(envelope, dict):
+            self._send_json(400, {"error": "envelope must be a JSON object"})
+            return
 
         # Log it
-        msg_id = envelope.get("id", "?")
-        sender = envelope.get("from", "?")
-        msg_type = envelope.get("type", "?")
-        subject = envelope.get("payload", {}).get("subject", "")
-        body_text = envelope.get("payload", {}).get("body", "")
+        try:
+            msg_id, sender, msg_type, payload = _envelope_fields(envelope)
+        except KeyError:
+            msg_id, sender, msg_type, payload = _envelope_fields({**_ENVELOPE_DEFAULTS, **envelope})
+        payload = payload or {}
+        subject = payload.get("subject", "")
 
         print(f"[MESH] {sender} → {MESH_AGENT} | {msg_type} | {subject[:60]}")
-        log_message(envelope)
+        log_message(envelope, subject=subject)
 
         # Store in inbox (for polling-based frameworks)
-        message_inbox.append(envelope)
-        if len(message_inbox) > MAX_INBOX:
-            message_inbox.pop(0)
+        with _inbox_lock:
+            message_inbox.append(envelope)
 
         # Dispatch to handler if configured
         response = dispatch_to_handler(envelope)
@@ -120,68 +397,70 @@ class MeshHandler(BaseHTTPRequestHandler):
         if response and msg_type == "request":
             reply_to = envelope.get("replyTo", {})
             if reply_to and reply_to.get("url"):
-                self._send_reply(envelope, response, reply_to)
+                self._send_reply(envelope, response, reply_to, subject)
 
         # Acknowledge receipt
-        self.send_response(202)
-        self.send_header("Content-Type", "application/json")
-        self.end_headers()
-        self.wfile.write(json.dumps({"ok": True, "id": msg_id}).encode())
+        self._send_json(202, {"ok": True, "id": msg_id})
 
     def do_GET(self):
         """GET /inbox - retrieve pending messages (for polling-based frameworks)."""
         if self.path == "/inbox":
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps({
-                "messages": list(message_inbox),
-                "count": len(message_inbox),
-            }).encode())
+            with _inbox_lock:
+                messages = list(message_inbox)
+            self._send_json(200, {
+                "messages": messages,
+                "count": len(messages),
+            })
             return
 
         if self.path == "/health":
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps({
+            self._send_json(200, {
                 "status": "ok",
                 "agent": MESH_AGENT,
                 "inbox": len(message_inbox),
-            }).encode())
+            })
             return
 
         self.send_response(404)
+        self.send_header("Content-Length", "0")
         self.end_headers()
 
-    def _send_reply(self, original, response, reply_to):
+    def _send_reply(self, original, response, reply_to, subject=""):
         """Send MESH response back to sender."""
-        import urllib.request
         reply_envelope = {
             "protocol": "mesh/1.0",
-            "id": f"msg_{os.urandom(16).hex()}",
-            "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "id": new_message_id(),
+            "timestamp": utc_timestamp(),
             "from": MESH_AGENT,
             "to": original.get("from", "?"),
             "type": "response",
             "correlationId": original.get("id"),
             "replyContext": original.get("replyContext"),
             "payload": {
-                "subject": f"Re: {original.get('payload', {}).get('subject', '')}",
-                "body": response.get("body", json.dumps(response)),
+                "subject": f"Re: {subject}",
+                "body": response["body"] if "body" in response else _dumps(response).decode("utf-8"),
             },
         }
+        envelope_json = _dumps(reply_envelope)
+        if reply_to.get("contentType") == MESH_CONTENT_TYPE:
+            # Target takes bare envelopes, so skip the string-in-JSON hook wrapper
+            data, content_type = envelope_json, MESH_CONTENT_TYPE
+        else:
+            data = _REPLY_WRAPPER_HEAD + _dumps(envelope_json.decode("utf-8")) + b"}"
+            content_type = "application/json"
+        headers = {
+            "Content-Type": content_type,
+            "Authorization": f"Bearer {reply_to.get('token', '')}",
+        }
         try:
-            req = urllib.request.Request(
-                reply_to["url"],
-                data=json.dumps({"message": json.dumps(reply_envelope)}).encode(),
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {reply_to.get('token', '')}",
-                },
-                method="POST",
-            )
-            urllib.request.urlopen(req, timeout=10)
+            if _reply_pool is not None:
+                resp = _reply_pool.request("POST", reply_to["url"], body=data, headers=headers)
+                if resp.status >= 400:
+                    raise RuntimeError(f"HTTP Error {resp.status}: {resp.reason}")
+            else:
+                import urllib.request
+                req = urllib.request.Request(reply_to["url"], data=data, headers=headers, method="POST")
+                urllib.request.urlopen(req, timeout=10)
             print(f"[MESH] Reply sent to {original.get('from')}")
         except Exception as e:
             print(f"[MESH] Reply failed: {e}", file=sys.stderr)
@@ -196,17 +475,25 @@ def main():
     print(f"🐝 MESH Generic Receiver v2.0")
     print(f"   Agent:   {MESH_AGENT}")
     print(f"   Port:    {port}")
-    print(f"   Handler: {HANDLER or '(none - inbox mode)'}")
+    print(f"   Handler: {HANDLER or '(none - inbox mode)'}{' (persistent)' if _worker else ''}")
     print(f"   Inbox:   GET http://0.0.0.0:{port}/inbox")
     print(f"   Health:  GET http://0.0.0.0:{port}/health")
     print()
 
-    server = HTTPServer(("0.0.0.0", port), MeshHandler)
+    # Treat SIGTERM like Ctrl-C so buffered audit entries are not lost
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), MeshHandler)
+    server.daemon_threads = True
     try:
         server.serve_forever()
     except KeyboardInterrupt:
         print("\n[MESH] Shutting down")
+    finally:
         server.server_close()
+        if _worker is not None:
+            _worker.close()
+        close_log()
 
 
 if __name__ == "__main__":